@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 import adsk.core, adsk.fusion
 
 from .. import voxler as vox
@@ -25,6 +28,8 @@ def test_driect_cube_creation():
     cube.color = (255, 0, 0, 255)
     cube.appearance = "Oak"
     cube.name = "name2"
+    cube.center = (12, 2, 0)
+    assert abs(cube.body.boundingBox.minPoint.y - 1.5) < 1e-6
 
 
 def test_direct_sphere_creation():
@@ -47,46 +52,243 @@ def test_direct_sphere_creation():
     sphere.name = "name2"
 
 
-# def test_cg_cube_creation():
-#     comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
-#     comp.name = "test cg cube creation"
-
-#     cube = vox.CGCube(comp, (0, 0, 0), 1)
-#     cube = vox.CGCube(comp, (0, 5, 0), 2)
-#     cube = vox.CGCube(comp, (2, 0, 0), 1, color=None, appearance=None)
-#     cube = vox.CGCube(comp, (4, 0, 0), 1, (0, 255, 0, 255))
-#     cube = vox.CGCube(comp, (6, 0, 0), 1, appearance="Oak", color=None)
-#     cube = vox.CGCube(comp, (8, 0, 0), 1, (255, 0, 0, 255), appearance="Oak")
-#     cube = vox.CGCube(
-#         comp, (10, 0, 0), 1, (255, 0, 0, 255), appearance="Oak", cg_group_id="asdasd"
-#     )
-#     cube = vox.CGCube(comp, (12, 0, 0), 1)
-#     cube.color = (255, 0, 0, 255)
-#     cube.appearance = "Oak"
-
-#     cube = vox.CGCube(comp, (15, 0, 0), 1)
-#     cube.delete()
-
-
-# def test_cg_sphere_creation():
-#     comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
-#     comp.name = "test cg sphere creation"
-
-#     sphere = vox.CGSphere(comp, (0, 0, 0), 1)
-#     sphere = vox.CGSphere(comp, (0, 5, 0), 2)
-#     sphere = vox.CGSphere(comp, (2, 0, 0), 1, color=None, appearance=None)
-#     sphere = vox.CGSphere(comp, (4, 0, 0), 1, (0, 255, 0, 255))
-#     sphere = vox.CGSphere(comp, (6, 0, 0), 1, appearance="Oak", color=None)
-#     sphere = vox.CGSphere(comp, (8, 0, 0), 1, (255, 0, 0, 255), appearance="Oak")
-#     sphere = vox.CGSphere(
-#         comp, (10, 0, 0), 1, (255, 0, 0, 255), appearance="Oak", cg_group_id="asdasd"
-#     )
-#     sphere = vox.CGSphere(comp, (12, 0, 0), 1)
-#     sphere.color = (255, 0, 0, 255)
-#     sphere.appearance = "Oak"
-
-#     sphere = vox.CGSphere(comp, (15, 0, 0), 1)
-#     sphere.delete()
+def test_direct_batch_creation():
+    comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+    comp.name = "test direct batch creation"
+
+    vox.DirectCube.create_batch(comp, [(i, 0, 0) for i in range(10)], 1)
+    vox.DirectCube.create_batch(
+        comp, [(i, 2, 0) for i in range(10)], 1, (255, 0, 0, 255), "Oak", "cubes"
+    )
+    vox.DirectSphere.create_batch(comp, [(i, 4, 0) for i in range(10)], 1)
+    vox.DirectCube.create_batch(comp, [(i, 6, 0) for i in range(10)], 1, parallel=True)
+    assert vox.DirectCube.create_batch(comp, [], 1) is None
+
+
+def test_packed_coordinates():
+    for xyz in [(0, 0, 0), (-5, 7, -3), (2**23 - 1, -(2**23), 2**15 - 1)]:
+        assert vox.unpack_xyz(vox.pack_xyz(*xyz)) == xyz
+    assert vox.unpack_xyz(vox.coarsen_packed(vox.pack_xyz(-5, 7, 3), 2)) == (-8, 4, 0)
+    assert vox.pack_center((2, 4, 6), 2) == vox.pack_xyz(1, 2, 3)
+
+    solid = {
+        vox.pack_xyz(x, y, z) for x in range(3) for y in range(3) for z in range(3)
+    }
+    assert vox.boundary_only(solid) == solid - {vox.pack_xyz(1, 1, 1)}
+
+    comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+    comp.name = "test packed coordinates"
+    cube = vox.DirectCube(comp, (2, 4, 6), 2)
+    assert cube.packed == vox.pack_xyz(1, 2, 3)
+    cube.center = (4, 4, 6)
+    assert cube.packed == vox.pack_xyz(2, 2, 3)
+
+
+def test_voxel_grid():
+    comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+    comp.name = "test voxel grid"
+
+    grid = vox.VoxelGrid()
+    for i in range(10):
+        grid.add((i, 0, 0), 1, (255, 0, 0, 255) if i % 2 else None, "Oak")
+        grid.add((i, 2, 0), 1, shape="sphere")
+    assert len(grid) == 20
+    assert grid.get(1)["shape"] == "sphere"
+    assert grid.bounding_box() == ((0, 0, 0), (9, 2, 0))
+    assert len(grid.indices_in_box((0, 1, 0), (9, 3, 0))) == 10
+
+    assert grid.add((3, 0, 0), 1, shape="sphere") == grid.index_of((3, 0, 0), 1)
+    assert len(grid) == 20
+
+    grid.remove(0)
+    assert len(grid) == 19
+    assert grid.index_of((0, 0, 0), 1) is None
+
+    offset = vox.VoxelGrid()
+    for x in (0.5, 1.5, 2.5, 3.5):
+        offset.add((x, 0, 0), 1)
+    assert len(offset) == 4
+    assert offset.center(1) == (1.5, 0, 0)
+    assert offset.add((0.5, 0, 0), 1, (255, 0, 0, 255)) == 0
+    assert len(offset) == 4
+    assert offset.index_of((2.5, 0, 0), 1) == 2
+
+    mixed = vox.VoxelGrid()
+    mixed.add((2, 0, 0), 1)
+    mixed.add((4, 0, 0), 2)
+    assert len(mixed) == 2
+    assert mixed.index_of((2, 0, 0), 1) == 0
+    assert mixed.index_of((4, 0, 0), 2) == 1
+
+    heatmap = vox.VoxelGrid()
+    for i in range(2**15 + 1):
+        heatmap.add((i, 0, 0), 1, (i % 256, i // 256, 0, 255))
+    assert len(heatmap.color_ids) == len(heatmap) == 2**15 + 1
+    assert heatmap.color(len(heatmap) - 1) == (0, 128, 0, 255)
+
+    grid.create_voxels(comp)
+    grid.create_bodies(comp)
+
+    solid = vox.VoxelGrid()
+    solid.add_many(
+        [(x, y, z) for x in range(5) for y in range(5) for z in range(-10, -5)],
+        1,
+        cull_interior=True,
+    )
+    assert len(solid) == 5**3 - 3**3
+
+    cube = vox.VoxelGrid()
+    for x in range(5):
+        for y in range(5):
+            for z in range(5):
+                cube.add((x, y, z), 1)
+    assert len(cube.shell()) == 5**3 - 3**3
+
+    half_offset = [
+        (x + 0.5, y + 0.5, z + 0.5)
+        for x in range(5)
+        for y in range(5)
+        for z in range(5)
+    ]
+    solid = vox.VoxelGrid()
+    solid.add_many(half_offset, 1, cull_interior=True)
+    assert len(solid) == 5**3 - 3**3
+
+    cube = vox.VoxelGrid()
+    cube.add_many(half_offset, 1)
+    assert len(cube.shell()) == 5**3 - 3**3
+
+    # the larger voxel shares its packed cell with the hidden center of the small voxels
+    # but must not be treated as their neighbour
+    mixed = vox.VoxelGrid()
+    mixed.add_many([(x, y, z) for x in range(3) for y in range(3) for z in range(3)], 1)
+    mixed.add((2, 2, 2), 2)
+    assert len(mixed.shell()) == 3**3
+
+
+def test_voxel_grid_serialization():
+    grid = vox.VoxelGrid()
+    for i in range(10):
+        grid.add((i, 0, 0.5), 1, (255, 0, 0, 255) if i % 2 else None, "Oak")
+        grid.add((i, 2, 0), 0.5, shape="sphere")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "grid.voxels")
+        grid.serialize_binary(path)
+        loaded = vox.VoxelGrid.load(path)
+
+    assert len(loaded) == len(grid)
+    assert all(loaded.get(i) == grid.get(i) for i in range(len(grid)))
+    assert loaded.index_of((3, 2, 0), 0.5) == grid.index_of((3, 2, 0), 0.5) is not None
+
+    loaded = vox.VoxelGrid.from_json(grid.serialize_json())
+    assert all(loaded.get(i) == grid.get(i) for i in range(len(grid)))
+
+
+def test_lazy_creation():
+    comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+    comp.name = "test lazy creation"
+
+    other_comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+    other_comp.name = "test lazy creation other"
+
+    cubes = [vox.DirectCube(comp, (i, 0, 0), 1, lazy=True) for i in range(10)]
+    other_cube = vox.DirectCube(other_comp, (0, 0, 0), 1, lazy=True)
+    # dropped voxels are never created
+    vox.DirectCube(comp, (20, 0, 0), 1, lazy=True)
+    assert comp.bRepBodies.count == 0
+    assert all(cube.is_pending for cube in cubes)
+
+    cubes[0].color = (255, 0, 0, 255)
+    cubes[1].delete()
+    # deleted voxels must not get a new body
+    cubes[1].side_length = 2
+    assert cubes[2].body is not None
+    assert comp.bRepBodies.count == 1
+
+    vox.Voxel.flush_pending(comp)
+    assert comp.bRepBodies.count == 9
+    assert other_cube.is_pending
+
+    vox.Voxel.flush_pending()
+    assert other_comp.bRepBodies.count == 1
+
+
+def test_cg_cube_creation():
+    comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+    comp.name = "test cg cube creation"
+
+    cube = vox.CGCube(comp, (0, 0, 0), 1)
+    cube = vox.CGCube(comp, (0, 5, 0), 2)
+    cube = vox.CGCube(comp, (2, 0, 0), 1, color=None, appearance=None)
+    cube = vox.CGCube(comp, (4, 0, 0), 1, (0, 255, 0, 255))
+    cube = vox.CGCube(comp, (6, 0, 0), 1, appearance="Oak", color=None)
+    cube = vox.CGCube(comp, (8, 0, 0), 1, (255, 0, 0, 255), appearance="Oak")
+    cube = vox.CGCube(
+        comp, (10, 0, 0), 1, (255, 0, 0, 255), appearance="Oak", cg_group_id="asdasd"
+    )
+    cube = vox.CGCube(comp, (12, 0, 0), 1)
+    cube.color = (255, 0, 0, 255)
+    cube.appearance = "Oak"
+    cube.center = (12, 2, 0)
+    cube.side_length = 2
+
+    cube = vox.CGCube(comp, (15, 0, 0), 1)
+    cube.delete()
+
+
+def test_cg_sphere_creation():
+    comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+    comp.name = "test cg sphere creation"
+
+    sphere = vox.CGSphere(comp, (0, 0, 0), 1)
+    sphere = vox.CGSphere(comp, (0, 5, 0), 2)
+    sphere = vox.CGSphere(comp, (2, 0, 0), 1, color=None, appearance=None)
+    sphere = vox.CGSphere(comp, (4, 0, 0), 1, (0, 255, 0, 255))
+    sphere = vox.CGSphere(comp, (6, 0, 0), 1, appearance="Oak", color=None)
+    sphere = vox.CGSphere(comp, (8, 0, 0), 1, (255, 0, 0, 255), appearance="Oak")
+    sphere = vox.CGSphere(
+        comp, (10, 0, 0), 1, (255, 0, 0, 255), appearance="Oak", cg_group_id="asdasd"
+    )
+    sphere = vox.CGSphere(comp, (12, 0, 0), 1)
+    sphere.color = (255, 0, 0, 255)
+    sphere.appearance = "Oak"
+
+    sphere = vox.CGSphere(comp, (15, 0, 0), 1)
+    sphere.delete()
+
+
+def test_instanced_voxel_cloud():
+    comp = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()).component
+    comp.name = "test instanced voxel cloud"
+
+    cloud = vox.InstancedVoxelCloud(comp, 1)
+    for x in range(20):
+        for y in range(20):
+            cloud.add((x, y, 0), (255, 0, 0, 255) if (x + y) % 2 else None)
+    cloud.add((0, 0, 5), side_length=3)
+    cloud.set_transform(0, [1, 0, 0, -5, 0, 2, 0, 0, 0, 0, 1, 0])
+    assert len(cloud) == 401
+
+    for idx, transform in [(401, [1] * 12), (-1, [1] * 12), (0, [1] * 11)]:
+        try:
+            cloud.set_transform(idx, transform)
+        except (IndexError, ValueError):
+            pass
+        else:
+            raise AssertionError("Invalid transform has been accepted.")
+    assert len(cloud.transforms) == 12 * len(cloud)
+
+    cloud.build()
+    assert cloud.number_of_meshes == 2
+
+    cloud.build()
+    cloud.clear()
+    assert len(cloud) == 0
+    assert cloud.number_of_meshes == 0
+
+    cloud.add((0, 0, 0), (0, 0, 255, 255))
+    assert cloud.color_table == [(0, 0, 255, 255)]
 
 
 def test_voxel_world_basic():
@@ -97,8 +299,11 @@ def test_voxel_world_basic():
     for i in range(10):
         world.add_voxel((0, 0, i), "cube", (0, 0, 100 + i * 10, 255), "Oak")
         world.add_voxel((0, i, 0), "cube", (0, 100 + i * 10, 0, 255), "Oak")
-        # world.add_voxel((0, -i, 0), vox.CGCube, (0, 100 + i * 10, 0, 255), "Oak")
-        # world.add_voxel((0, 0, -i), vox.CGSphere, (0, 100 + i * 10, 0, 255), "Oak")
+
+    graphics_world = vox.VoxelWorld(1, comp, offset=(2, 0, 0), mode="graphics")
+    for i in range(10):
+        graphics_world.add_voxel((0, -i, 0), "cube", (0, 100 + i * 10, 0, 255), "Oak")
+        graphics_world.add_voxel((0, 0, -i), "sphere", (0, 100 + i * 10, 0, 255), "Oak")
 
 
 def test_world_color_change():
@@ -144,6 +349,14 @@ def test_clear():
 ALL_CASES = [
     test_driect_cube_creation,
     test_direct_sphere_creation,
+    test_direct_batch_creation,
+    test_cg_cube_creation,
+    test_cg_sphere_creation,
+    test_instanced_voxel_cloud,
+    test_packed_coordinates,
+    test_voxel_grid,
+    test_voxel_grid_serialization,
+    test_lazy_creation,
     test_voxel_world_basic,
     test_world_color_change,
     test_world_update,
@@ -1,2 +1,5 @@
+from .coordinates import *
 from .voxels import *
-from .world import *
\ No newline at end of file
+from .world import *
+from .voxel_grid import *
+from .voxel_cloud import *
\ No newline at end of file
@@ -0,0 +1,162 @@
+from math import floor
+from typing import Tuple, Set
+
+
+def pack_xyz(x: int, y: int, z: int, bx: int = 24, by: int = 24, bz: int = 16) -> int:
+    """Packs integer (x,y,z) grid coordinates into a single integer with the bit layout
+    [x: bx bits | y: by bits | z: bz bits]. Each field stores its value with an offset of
+    2**(bits-1) so negative coordinates are supported and the neighbours of a coordinate can
+    be reached by adding or subtracting 1 << field_shift.
+
+    Args:
+        x (int): The x coordinate in the range [-2**(bx-1), 2**(bx-1)).
+        y (int): The y coordinate in the range [-2**(by-1), 2**(by-1)).
+        z (int): The z coordinate in the range [-2**(bz-1), 2**(bz-1)).
+        bx (int, optional): Number of bits of the x field. Defaults to 24.
+        by (int, optional): Number of bits of the y field. Defaults to 24.
+        bz (int, optional): Number of bits of the z field. Defaults to 16.
+
+    Returns:
+        int: The packed coordinate which fits into bx+by+bz unsigned bits.
+    """
+    x += 1 << (bx - 1)
+    y += 1 << (by - 1)
+    z += 1 << (bz - 1)
+    if not (0 <= x < 1 << bx and 0 <= y < 1 << by and 0 <= z < 1 << bz):
+        raise ValueError("Coordinate exceeds the range of the packed bit fields.")
+    return (x << (by + bz)) | (y << bz) | z
+
+
+def unpack_xyz(
+    packed: int, bx: int = 24, by: int = 24, bz: int = 16
+) -> Tuple[int, int, int]:
+    """Reverses pack_xyz.
+
+    Args:
+        packed (int): The packed coordinate.
+        bx (int, optional): Number of bits of the x field. Defaults to 24.
+        by (int, optional): Number of bits of the y field. Defaults to 24.
+        bz (int, optional): Number of bits of the z field. Defaults to 16.
+
+    Returns:
+        Tuple[int, int, int]: The (x,y,z) grid coordinates.
+    """
+    return (
+        ((packed >> (by + bz)) & ((1 << bx) - 1)) - (1 << (bx - 1)),
+        ((packed >> bz) & ((1 << by) - 1)) - (1 << (by - 1)),
+        (packed & ((1 << bz) - 1)) - (1 << (bz - 1)),
+    )
+
+
+def coarsen_packed(
+    packed: int, level: int, bx: int = 24, by: int = 24, bz: int = 16
+) -> int:
+    """Maps a packed coordinate onto the grid which is 2**level times coarser by clearing the
+    lowest level bits of each field. This equals flooring every coordinate to a multiple of
+    2**level but works directly on the packed value.
+
+    Args:
+        packed (int): The packed coordinate.
+        level (int): The number of halvings of the grid resolution.
+        bx (int, optional): Number of bits of the x field. Defaults to 24.
+        by (int, optional): Number of bits of the y field. Defaults to 24.
+        bz (int, optional): Number of bits of the z field. Defaults to 16.
+
+    Returns:
+        int: The packed coordinate of the coarse cell containing the passed coordinate.
+    """
+    low_bits = (1 << level) - 1
+    mask = (low_bits << (by + bz)) | (low_bits << bz) | low_bits
+    return packed & ~mask & ((1 << (bx + by + bz)) - 1)
+
+
+def pack_center(
+    center: Tuple[float], side_length: float, tolerance: float = 1e-6
+) -> int:
+    """Converts a real (x,y,z) center on the grid with the given side length, i.e. every
+    coordinate is a multiple of the side length, to grid coordinates and packs them.
+
+    Args:
+        center (Tuple[float]): The center point as (x,y,z) tuple in Fusion units.
+        side_length (float): The size of a grid cell.
+        tolerance (float, optional): The maximal deviation from the grid in multiples of
+            the side length. Defaults to 1e-6.
+
+    Raises:
+        ValueError: If the center is not on the grid or exceeds the range of the packed
+            bit fields.
+
+    Returns:
+        int: The packed grid coordinate of the center.
+    """
+    grid_coordinates = []
+    for c in center:
+        q = c / side_length
+        k = round(q)
+        # centers between grid points must not be snapped onto the cell of a neighbour
+        if abs(q - k) > tolerance:
+            raise ValueError("Center is not on the grid of the side length.")
+        grid_coordinates.append(k)
+    return pack_xyz(*grid_coordinates)
+
+
+def lattice_offset(
+    center: Tuple[float], side_length: float, decimals: int = 6
+) -> Tuple[float, float, float]:
+    """Calculates the offset of the grid with the given side length on which the center
+    lies. The offset is the fractional part of each coordinate in multiples of the side
+    length, e.g. (0.5, 0, 0) for the center (2.5, 1, 0) and the side length 1. Voxels of
+    the same side length are only neighbours if their centers have equal offsets.
+
+    Args:
+        center (Tuple[float]): The center point as (x,y,z) tuple in Fusion units.
+        side_length (float): The size of a grid cell.
+        decimals (int, optional): The number of decimals the offset is rounded to so
+            floating point errors do not separate centers on the same grid. Defaults to 6.
+
+    Returns:
+        Tuple[float, float, float]: The offset in the range [0, 1) per axis.
+    """
+    offset = []
+    for c in center:
+        q = c / side_length
+        # values which round up to 1 are on the grid without offset
+        offset.append(round(q - floor(q), decimals) % 1.0)
+    return tuple(offset)
+
+
+def boundary_only(
+    packed_set: Set[int], grid_bits: Tuple[int, int, int] = (24, 24, 16)
+) -> Set[int]:
+    """Filters the packed cells which have at least one of their six neighbours missing,
+    i.e. the cells which form the visible shell of the occupied volume. The neighbours are
+    reached by adding or subtracting 1 << field_shift to the packed value directly.
+
+    Args:
+        packed_set (Set[int]): The occupied cells as packed coordinates.
+        grid_bits (Tuple[int, int, int], optional): The number of bits of the x, y and z
+            field used for packing. Defaults to (24, 24, 16).
+
+    Returns:
+        Set[int]: The packed cells at the boundary.
+    """
+    bx, by, bz = grid_bits
+    # (shift, max value) of the x, y and z field
+    fields = [(by + bz, (1 << bx) - 1), (bz, (1 << by) - 1), (0, (1 << bz) - 1)]
+
+    boundary = set()
+    for packed in packed_set:
+        for shift, max_value in fields:
+            value = (packed >> shift) & max_value
+            step = 1 << shift
+            # at the edge of a field the neighbour would overflow into the next field
+            # and can not be occupied
+            if (
+                value == max_value
+                or value == 0
+                or packed + step not in packed_set
+                or packed - step not in packed_set
+            ):
+                boundary.add(packed)
+                break
+    return boundary
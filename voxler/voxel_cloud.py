@@ -0,0 +1,228 @@
+from array import array
+from math import sqrt
+from typing import List, Dict, Tuple
+
+import adsk.core, adsk.fusion
+
+from .voxels import (
+    CGVoxel,
+    CUBE_MESH_COORDINATES,
+    CUBE_MESH_INDICES,
+    CUBE_MESH_NORMALS,
+    _get_graphics_group,
+    _intern_color,
+)
+
+
+def _cross(a: List[float], b: List[float]) -> Tuple[float, float, float]:
+    return (
+        a[1] * b[2] - a[2] * b[1],
+        a[2] * b[0] - a[0] * b[2],
+        a[0] * b[1] - a[1] * b[0],
+    )
+
+
+def _normal_matrix(m: List[float]) -> Tuple[Tuple[float, float, float]]:
+    """Calculates the matrix which transforms the normals of a mesh transformed by the
+    given affine transform. This is the inverse transpose of the linear part which equals
+    its cofactor matrix up to the factor det. The factor is dropped as the normals are
+    normalized anyway, only its sign is kept so mirroring transforms do not flip the normals.
+
+    Args:
+        m (List[float]): The row major 3x4 affine matrix as 12 floats.
+
+    Returns:
+        Tuple[Tuple[float, float, float]]: The rows of the 3x3 normal matrix.
+    """
+    r0, r1, r2 = m[0:3], m[4:7], m[8:11]
+    c0, c1, c2 = _cross(r1, r2), _cross(r2, r0), _cross(r0, r1)
+    det = r0[0] * c0[0] + r0[1] * c0[1] + r0[2] * c0[2]
+    sign = -1 if det < 0 else 1
+    return tuple(tuple(sign * v for v in c) for c in (c0, c1, c2))
+
+
+class InstancedVoxelCloud:
+    def __init__(
+        self,
+        component: adsk.fusion.Component,
+        side_length: float,
+        appearance: str = "Prism-256",
+        cg_group_id: str = "voxler_cloud",
+    ):
+        """Displays a huge number of cubic voxels as custom graphics with as few entities as
+        possible. Every voxel is an instance of the unit cube mesh which is placed by its own
+        affine transform. Fusion has no instanced drawing for custom graphics, therefore the
+        instances are baked into one mesh per color when calling build(). This way a cloud
+        with N voxels and K colors only creates K custom graphics entities.
+
+        The per voxel data is stored in contiguous arrays:
+            - transforms: the row major 3x4 affine matrix of each voxel as flat float32 array
+                of length 12*N
+            - color_ids: int32 array of length N with the index into the color table or -1
+                if the voxel has no color
+
+        Args:
+            component (adsk.fusion.Component): The component in which the graphics are displayed.
+            side_length (float): The default side length of the voxels in Fusion units.
+            appearance (str, optional): The ID of the appearance in the "Fusion 360 Appearance
+                Library" which is used for voxels without color. Defaults to "Prism-256".
+            cg_group_id (str, optional): The id of the custom graphics group in the component
+                into which the meshes are created. Defaults to "voxler_cloud".
+        """
+        self._component = component
+        self._side_length = side_length
+        self._appearance = appearance
+        self._graphics = _get_graphics_group(component, cg_group_id)
+
+        self.transforms = array("f")
+        self.color_ids = array("i")
+        self.color_table: List[Tuple[int]] = []
+        self._color_ids: Dict[Tuple[int], int] = {}
+
+        # {color_id: CustomGraphicsMesh} of the currently displayed meshes
+        self._meshes: Dict[int, adsk.fusion.CustomGraphicsMesh] = {}
+
+    def __len__(self) -> int:
+        return len(self.color_ids)
+
+    def add(
+        self,
+        center: Tuple[float],
+        color: Tuple[int] = None,
+        side_length: float = None,
+    ) -> int:
+        """Adds a voxel to the cloud. The voxel gets displayed with the next call of build().
+
+        Args:
+            center (Tuple[float]): The center point of the voxel as (x,y,z) tuple.
+            color (Tuple[int], optional): Color of the voxel as (r,g,b,o) tuple (0 to 255).
+                Defaults to None which means that the appearance of the cloud is used.
+            side_length (float, optional): The side length of this voxel. Defaults to the side
+                length of the cloud.
+
+        Returns:
+            int: The index of the voxel in the cloud.
+        """
+        x, y, z = center
+        s = side_length if side_length is not None else self._side_length
+
+        # the color id is resolved before modifying any array so they stay in sync
+        color = _intern_color(color)
+        if color is None:
+            color_id = -1
+        else:
+            color_id = self._color_ids.get(color)
+            if color_id is None:
+                color_id = len(self.color_table)
+                self.color_table.append(color)
+                self._color_ids[color] = color_id
+
+        self.transforms.extend((s, 0, 0, x, 0, s, 0, y, 0, 0, s, z))
+        self.color_ids.append(color_id)
+
+        return len(self) - 1
+
+    def set_transform(self, idx: int, transform: List[float]):
+        """Replaces the affine transform of a voxel which is applied to the unit cube. The
+        change gets displayed with the next call of build().
+
+        Args:
+            idx (int): The index of the voxel.
+            transform (List[float]): The row major 3x4 affine matrix as 12 floats.
+
+        Raises:
+            IndexError: If there is no voxel with the given index.
+            ValueError: If the transform does not consist of 12 values.
+        """
+        # slice assignment would resize the array instead of failing
+        if not 0 <= idx < len(self):
+            raise IndexError("Voxel index out of range.")
+        transform = array("f", transform)
+        if len(transform) != 12:
+            raise ValueError("The transform must be a 3x4 matrix of 12 values.")
+        self.transforms[12 * idx : 12 * idx + 12] = transform
+
+    def _build_mesh(self, indices: List[int]) -> adsk.fusion.CustomGraphicsMesh:
+        """Creates a single mesh containing the unit cube transformed by the affine transform
+        of each of the given voxels.
+
+        Args:
+            indices (List[int]): The indices of the voxels which are part of the mesh.
+
+        Returns:
+            adsk.fusion.CustomGraphicsMesh: The created mesh.
+        """
+        n_vertices = len(CUBE_MESH_COORDINATES) // 3
+
+        coordinates = []
+        normals = []
+        vertex_indices = []
+        for i, idx in enumerate(indices):
+            m = self.transforms[12 * idx : 12 * idx + 12]
+            normal_matrix = _normal_matrix(m)
+            for v in range(n_vertices):
+                x, y, z = CUBE_MESH_COORDINATES[3 * v : 3 * v + 3]
+                coordinates += (
+                    m[0] * x + m[1] * y + m[2] * z + m[3],
+                    m[4] * x + m[5] * y + m[6] * z + m[7],
+                    m[8] * x + m[9] * y + m[10] * z + m[11],
+                )
+
+                x, y, z = CUBE_MESH_NORMALS[3 * v : 3 * v + 3]
+                nx, ny, nz = (r[0] * x + r[1] * y + r[2] * z for r in normal_matrix)
+                length = sqrt(nx * nx + ny * ny + nz * nz) or 1
+                normals += (nx / length, ny / length, nz / length)
+
+            offset = i * n_vertices
+            vertex_indices += [offset + j for j in CUBE_MESH_INDICES]
+
+        return self._graphics.addMesh(
+            adsk.fusion.CustomGraphicsCoordinates.create(coordinates),
+            vertex_indices,
+            normals,
+            vertex_indices,
+        )
+
+    def build(self):
+        """(Re)creates the displayed meshes from the current voxels of the cloud. All voxels
+        with the same color are combined into one mesh.
+        """
+        self.clear_graphics()
+
+        # {color_id: [idx, ...]}
+        groups: Dict[int, List[int]] = {}
+        for idx, color_id in enumerate(self.color_ids):
+            groups.setdefault(color_id, []).append(idx)
+
+        for color_id, indices in groups.items():
+            color = self.color_table[color_id] if color_id >= 0 else None
+            mesh = self._build_mesh(indices)
+            mesh.color = CGVoxel._lookup_color_effect(self._appearance, color)
+            self._meshes[color_id] = mesh
+
+    def clear_graphics(self):
+        """Removes the displayed meshes but keeps the voxels of the cloud."""
+        for mesh in self._meshes.values():
+            mesh.deleteMe()
+        self._meshes = {}
+
+    def clear(self):
+        """Removes all voxels from the cloud and the displayed meshes."""
+        self.clear_graphics()
+        self.transforms = array("f")
+        self.color_ids = array("i")
+        self.color_table = []
+        self._color_ids = {}
+
+    @property
+    def component(self) -> adsk.fusion.Component:
+        return self._component
+
+    @property
+    def side_length(self) -> float:
+        return self._side_length
+
+    @property
+    def number_of_meshes(self) -> int:
+        """The number of currently displayed meshes, i.e. one per color of the last build()."""
+        return len(self._meshes)
@@ -0,0 +1,536 @@
+import json
+import sys
+import zipfile
+from array import array
+from typing import List, Dict, Tuple, Any, Optional, Iterable
+
+import adsk.core, adsk.fusion
+
+# orjson is much faster than the json module but usually not available in Fusion
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .coordinates import boundary_only, lattice_offset
+from .voxels import VOXEL_CLASSES, DirectVoxel, Voxel, _pack_center
+
+# the shapes which can be stored in a grid, the position in this tuple is the stored shape id
+SHAPES = ("cube", "sphere")
+
+# names of the array attributes which hold the per voxel fields
+_ARRAY_FIELDS = ("centers", "side_lengths", "color_ids", "appearance_ids", "shapes")
+
+
+def _grid_cell(
+    center: Tuple[float], side_length: float
+) -> Tuple[Tuple[float, Tuple[float, float, float]], Optional[int]]:
+    """Locates the center on the grid of its side length and offset.
+
+    Args:
+        center (Tuple[float]): The center point as (x,y,z) tuple in Fusion units.
+        side_length (float): The side length of the voxel.
+
+    Returns:
+        Tuple[Tuple[float, Tuple[float, float, float]], Optional[int]]: The
+            (side_length, offset) of the grid (see coordinates.lattice_offset) and the
+            packed cell on this grid or None if the cell exceeds the packable range.
+    """
+    offset = lattice_offset(center, side_length)
+    # shift the center onto the grid without offset to pack it
+    cell = _pack_center(
+        [c - o * side_length for c, o in zip(center, offset)], side_length
+    )
+    return (side_length, offset), cell
+
+
+def _boundary_flags(
+    centers: List[Tuple[float]], side_lengths: List[float]
+) -> List[bool]:
+    """Checks for each voxel whether at least one of its six neighbour cells is free.
+    Only voxels with the same side length on the same grid (see coordinates.lattice_offset)
+    are neighbours, so the voxels are grouped by both before calling boundary_only.
+    Voxels which can not be packed are always considered at the boundary.
+
+    Args:
+        centers (List[Tuple[float]]): The center points of the voxels as (x,y,z) tuples.
+        side_lengths (List[float]): The side lengths of the voxels.
+
+    Returns:
+        List[bool]: Whether the voxel at the same position is at the boundary.
+    """
+    # [((side_length, offset), packed_cell or None), ...] of every voxel
+    cells = []
+    # {(side_length, offset): {packed_cell, ...}}
+    groups: Dict[Tuple, set] = {}
+    for center, side_length in zip(centers, side_lengths):
+        key, cell = _grid_cell(center, side_length)
+        cells.append((key, cell))
+        if cell is not None:
+            groups.setdefault(key, set()).add(cell)
+
+    boundaries = {key: boundary_only(group) for key, group in groups.items()}
+    return [cell is None or cell in boundaries[key] for key, cell in cells]
+
+
+class VoxelGrid:
+    def __init__(self):
+        """A lightweight container which stores the definition of many voxels without creating
+        any Fusion bodies. The fields of all voxels are stored as structure of arrays in
+        contiguous typed arrays:
+            - centers: (x,y,z) of each voxel as flat float64 array of length 3*N
+            - side_lengths: float64 array of length N
+            - color_ids: int32 array of length N with the index into the color table or -1
+                if the voxel has no color
+            - appearance_ids: int32 array of length N with the index into the appearance table
+            - shapes: int8 array of length N with the index into SHAPES
+
+        Colors and appearances are stored as indices into small tables as most grids only
+        use a few distinct values. A voxel is identified by its index in the grid.
+        Adding a voxel with the same center and side length as an existing voxel
+        overwrites the existing voxel.
+        """
+        self.centers = array("d")
+        self.side_lengths = array("d")
+        self.color_ids = array("i")
+        self.appearance_ids = array("i")
+        self.shapes = array("b")
+
+        # tables of the distinct values and their reverse lookup {value: id}
+        self.color_table: List[Tuple[int]] = []
+        self.appearance_table: List[str] = []
+        self._color_ids: Dict[Tuple[int], int] = {}
+        self._appearance_ids: Dict[str, int] = {}
+
+        # {(side_length, offset, packed_cell): index} of all voxels, see _grid_cell
+        self._cells: Dict[Tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.side_lengths)
+
+    def _get_color_id(self, color: Optional[Tuple[int]]) -> int:
+        if color is None:
+            return -1
+        color = tuple(color)
+        color_id = self._color_ids.get(color)
+        if color_id is None:
+            color_id = len(self.color_table)
+            self.color_table.append(color)
+            self._color_ids[color] = color_id
+        return color_id
+
+    def _get_appearance_id(self, appearance: str) -> int:
+        appearance_id = self._appearance_ids.get(appearance)
+        if appearance_id is None:
+            appearance_id = len(self.appearance_table)
+            self.appearance_table.append(appearance)
+            self._appearance_ids[appearance] = appearance_id
+        return appearance_id
+
+    def add(
+        self,
+        center: Tuple[float],
+        side_length: float,
+        color: Tuple[int] = None,
+        appearance: str = "Prism-256",
+        shape: str = "cube",
+    ) -> int:
+        """Appends a voxel definition to the grid. If a voxel with the same center and side
+        length already exists it is overwritten instead.
+
+        Args:
+            center (Tuple[float]): The center point of the voxel as (x,y,z) tuple in Fusion units.
+            side_length (float): The side length of the voxel in Fusion units.
+            color (Tuple[int], optional): Color of the voxel as (r,g,b,o) tuple (0 to 255).
+                Defaults to None which means that the standard appearance is used.
+            appearance (str, optional): The ID of the appearance in the "Fusion 360 Appearance
+                Library". Defaults to "Prism-256".
+            shape (str, optional): The shape of the voxel, one of SHAPES. Defaults to "cube".
+
+        Returns:
+            int: The index of the added voxel.
+        """
+        if shape not in SHAPES:
+            raise ValueError("Invalid shape argument.")
+
+        # resolve all values before modifying any array so a failure can not leave the
+        # arrays with different lengths
+        center = array("d", center)
+        side_length = float(side_length)
+        color_id = self._get_color_id(color)
+        appearance_id = self._get_appearance_id(appearance)
+        shape_id = SHAPES.index(shape)
+
+        cell = self._cell_key(center, side_length)
+        idx = self._cells.get(cell)
+        if idx is not None and self.centers[3 * idx : 3 * idx + 3] == center:
+            self.centers[3 * idx : 3 * idx + 3] = center
+            self.side_lengths[idx] = side_length
+            self.color_ids[idx] = color_id
+            self.appearance_ids[idx] = appearance_id
+            self.shapes[idx] = shape_id
+            return idx
+
+        if cell is not None and idx is None:
+            self._cells[cell] = len(self)
+        self.centers.extend(center)
+        self.side_lengths.append(side_length)
+        self.color_ids.append(color_id)
+        self.appearance_ids.append(appearance_id)
+        self.shapes.append(shape_id)
+
+        return len(self) - 1
+
+    def add_many(
+        self,
+        centers: Iterable[Tuple[float]],
+        side_length: float,
+        color: Tuple[int] = None,
+        appearance: str = "Prism-256",
+        shape: str = "cube",
+        cull_interior: bool = False,
+    ) -> List[int]:
+        """Adds many voxels with the same properties to the grid. Optionally the voxels which
+        are completely surrounded by other voxels of the passed centers are skipped as they are
+        not visible. For solid shapes this avoids creating most of the bodies.
+
+        Args:
+            centers (Iterable[Tuple[float]]): The center points of the voxels as (x,y,z) tuples.
+            side_length (float): The side length of the voxels in Fusion units.
+            color (Tuple[int], optional): Color of the voxels as (r,g,b,o) tuple (0 to 255).
+                Defaults to None which means that the standard appearance is used.
+            appearance (str, optional): The ID of the appearance in the "Fusion 360 Appearance
+                Library". Defaults to "Prism-256".
+            shape (str, optional): The shape of the voxels, one of SHAPES. Defaults to "cube".
+            cull_interior (bool, optional): Whether to skip voxels whose six neighbours are all
+                part of the passed centers. Defaults to False.
+
+        Returns:
+            List[int]: The indices of the added voxels.
+        """
+        centers = [tuple(center) for center in centers]
+
+        if cull_interior:
+            flags = _boundary_flags(centers, [side_length] * len(centers))
+            centers = [center for center, flag in zip(centers, flags) if flag]
+
+        return [
+            self.add(center, side_length, color, appearance, shape)
+            for center in centers
+        ]
+
+    def remove(self, idx: int):
+        """Removes the voxel at the given index. The last voxel of the grid is moved to
+        the freed index so the indices of other voxels stay valid except for the last one.
+
+        Args:
+            idx (int): The index of the voxel to remove.
+        """
+        last = len(self) - 1
+        self._unindex(idx)
+        if idx != last:
+            self._unindex(last)
+            self.centers[3 * idx : 3 * idx + 3] = self.centers[3 * last : 3 * last + 3]
+            self.side_lengths[idx] = self.side_lengths[last]
+            self.color_ids[idx] = self.color_ids[last]
+            self.appearance_ids[idx] = self.appearance_ids[last]
+            self.shapes[idx] = self.shapes[last]
+            self._index(idx)
+
+        del self.centers[3 * last :]
+        del self.side_lengths[last]
+        del self.color_ids[last]
+        del self.appearance_ids[last]
+        del self.shapes[last]
+
+    def shell(self) -> "VoxelGrid":
+        """Returns a new grid which only contains the voxels of this grid which have at least
+        one free neighbour cell, i.e. which are visible from the outside.
+
+        Returns:
+            VoxelGrid: The grid containing only the boundary voxels.
+        """
+        flags = _boundary_flags(
+            [self.center(i) for i in range(len(self))], self.side_lengths
+        )
+
+        shell = VoxelGrid()
+        for i, flag in enumerate(flags):
+            if flag:
+                shell.add(
+                    self.center(i),
+                    self.side_lengths[i],
+                    self.color(i),
+                    self.appearance(i),
+                    self.shape(i),
+                )
+        return shell
+
+    @staticmethod
+    def _cell_key(center: Tuple[float], side_length: float) -> Optional[Tuple]:
+        (side_length, offset), packed = _grid_cell(center, side_length)
+        return (side_length, offset, packed) if packed is not None else None
+
+    def _cell(self, idx: int) -> Optional[Tuple]:
+        return self._cell_key(self.center(idx), self.side_lengths[idx])
+
+    def _index(self, idx: int):
+        """Adds the voxel at the given index to the cell lookup unless its cell is
+        already indexed."""
+        cell = self._cell(idx)
+        if cell is not None:
+            self._cells.setdefault(cell, idx)
+
+    def _unindex(self, idx: int):
+        """Removes the voxel at the given index from the cell lookup."""
+        cell = self._cell(idx)
+        if cell is not None and self._cells.get(cell) == idx:
+            del self._cells[cell]
+
+    def index_of(self, center: Tuple[float], side_length: float) -> Optional[int]:
+        """Returns the index of the voxel with the given center and side length or None
+        if there is no such voxel.
+
+        Args:
+            center (Tuple[float]): The center point as (x,y,z) tuple in Fusion units.
+            side_length (float): The side length of the voxel.
+
+        Returns:
+            Optional[int]: The index of the voxel.
+        """
+        return self._cells.get(self._cell_key(center, side_length))
+
+    def center(self, idx: int) -> Tuple[float]:
+        """The center of the voxel at the given index as (x,y,z) tuple."""
+        return tuple(self.centers[3 * idx : 3 * idx + 3])
+
+    def color(self, idx: int) -> Optional[Tuple[int]]:
+        """The color of the voxel at the given index as (r,g,b,o) tuple or None."""
+        color_id = self.color_ids[idx]
+        return self.color_table[color_id] if color_id >= 0 else None
+
+    def appearance(self, idx: int) -> str:
+        """The appearance ID of the voxel at the given index."""
+        return self.appearance_table[self.appearance_ids[idx]]
+
+    def shape(self, idx: int) -> str:
+        """The shape of the voxel at the given index."""
+        return SHAPES[self.shapes[idx]]
+
+    def get(self, idx: int) -> Dict[str, Any]:
+        """Returns the definition of the voxel at the given index.
+
+        Args:
+            idx (int): The index of the voxel.
+
+        Returns:
+            Dict[str, Any]: The voxel definition as {center, side_length, color, appearance, shape} dict.
+        """
+        return {
+            "center": self.center(idx),
+            "side_length": self.side_lengths[idx],
+            "color": self.color(idx),
+            "appearance": self.appearance(idx),
+            "shape": self.shape(idx),
+        }
+
+    def bounding_box(self) -> Tuple[Tuple[float], Tuple[float]]:
+        """Calculates the axis aligned bounding box of the centers of all voxels in the grid.
+
+        Returns:
+            Tuple[Tuple[float], Tuple[float]]: The ((x_min,y_min,z_min), (x_max,y_max,z_max))
+                corners of the bounding box or None if the grid is empty.
+        """
+        if len(self) == 0:
+            return None
+        xs, ys, zs = self.centers[0::3], self.centers[1::3], self.centers[2::3]
+        return (min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs))
+
+    def indices_in_box(
+        self, min_corner: Tuple[float], max_corner: Tuple[float]
+    ) -> List[int]:
+        """Returns the indices of all voxels whose center lies within the given box (inclusive).
+
+        Args:
+            min_corner (Tuple[float]): The (x_min, y_min, z_min) corner of the box.
+            max_corner (Tuple[float]): The (x_max, y_max, z_max) corner of the box.
+
+        Returns:
+            List[int]: The indices of the voxels inside the box.
+        """
+        x_min, y_min, z_min = min_corner
+        x_max, y_max, z_max = max_corner
+        centers = self.centers
+        return [
+            i
+            for i in range(len(self))
+            if x_min <= centers[3 * i] <= x_max
+            and y_min <= centers[3 * i + 1] <= y_max
+            and z_min <= centers[3 * i + 2] <= z_max
+        ]
+
+    def create_voxels(
+        self,
+        component: adsk.fusion.Component,
+        name: str = "Voxel",
+        mode: str = "brep",
+        lazy: bool = False,
+    ) -> List[Voxel]:
+        """Creates a separate voxel instance for each voxel in the grid.
+
+        Args:
+            component (adsk.fusion.Component): The component into which the voxels are created.
+            name (str, optional): The body name of the created voxels. Defaults to "Voxel".
+            mode (str, optional): "brep" to create DirectVoxels or "graphics" to create
+                CGVoxels. Defaults to "brep".
+            lazy (bool, optional): Whether to defer the body creation of the voxels until
+                they are accessed or Voxel.flush_pending() is called. Defaults to False.
+
+        Returns:
+            List[Voxel]: The created voxels in the order of the grid.
+        """
+        return [
+            VOXEL_CLASSES[(self.shape(i), mode)](
+                component,
+                self.center(i),
+                self.side_lengths[i],
+                self.color(i),
+                self.appearance(i),
+                name,
+                lazy=lazy,
+            )
+            for i in range(len(self))
+        ]
+
+    def create_bodies(
+        self,
+        component: adsk.fusion.Component,
+        name: str = "Voxels",
+        parallel: bool = False,
+    ) -> List[adsk.fusion.BRepBody]:
+        """Creates the voxels of the grid with as few bodies as possible. All voxels which
+        share shape, side length, color and appearance are created as one body using
+        DirectVoxel.create_batch.
+
+        Args:
+            component (adsk.fusion.Component): The component into which the bodies are created.
+            name (str, optional): The name of the created bodies. Defaults to "Voxels".
+            parallel (bool, optional): Passed to DirectVoxel.create_batch. Defaults to False.
+
+        Returns:
+            List[adsk.fusion.BRepBody]: The created bodies. These are not managed by any voxel
+                instance and must be deleted by the caller.
+        """
+        # {(shape_id, side_length, color_id, appearance_id): [center, ...]}
+        groups: Dict[Tuple, List[Tuple[float]]] = {}
+        for i in range(len(self)):
+            key = (
+                self.shapes[i],
+                self.side_lengths[i],
+                self.color_ids[i],
+                self.appearance_ids[i],
+            )
+            groups.setdefault(key, []).append(self.center(i))
+
+        return [
+            VOXEL_CLASSES[(SHAPES[shape_id], DirectVoxel.mode)].create_batch(
+                component,
+                centers,
+                side_length,
+                self.color_table[color_id] if color_id >= 0 else None,
+                self.appearance_table[appearance_id],
+                name,
+                parallel,
+            )
+            for (
+                shape_id,
+                side_length,
+                color_id,
+                appearance_id,
+            ), centers in groups.items()
+        ]
+
+    def serialize_binary(self, path: str):
+        """Writes the grid to a compressed zip archive. Each per voxel array is stored as raw
+        bytes which is much more compact and faster than serializing each voxel on its own.
+        The color and appearance tables are stored in a json header.
+
+        Args:
+            path (str): The path of the file to write.
+        """
+        header = {
+            "byteorder": sys.byteorder,
+            "color_table": [list(color) for color in self.color_table],
+            "appearance_table": self.appearance_table,
+        }
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("header.json", json.dumps(header))
+            for field in _ARRAY_FIELDS:
+                archive.writestr(field, getattr(self, field).tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> "VoxelGrid":
+        """Reads a grid which has been written by serialize_binary.
+
+        Args:
+            path (str): The path of the file to read.
+
+        Returns:
+            VoxelGrid: The loaded grid.
+        """
+        grid = cls()
+        with zipfile.ZipFile(path) as archive:
+            header = json.loads(archive.read("header.json"))
+            for field in _ARRAY_FIELDS:
+                values = getattr(grid, field)
+                values.frombytes(archive.read(field))
+                if header["byteorder"] != sys.byteorder:
+                    values.byteswap()
+
+        grid._set_tables(header["color_table"], header["appearance_table"])
+        return grid
+
+    def _set_tables(self, color_table: List[List[int]], appearance_table: List[str]):
+        """Sets the color and appearance tables and rebuilds all lookups after the arrays
+        have been filled directly.
+        """
+        self.color_table = [tuple(color) for color in color_table]
+        self.appearance_table = list(appearance_table)
+        self._color_ids = {color: i for i, color in enumerate(self.color_table)}
+        self._appearance_ids = {a: i for i, a in enumerate(self.appearance_table)}
+        self._cells = {}
+        for i in range(len(self)):
+            self._index(i)
+
+    def serialize_json(self) -> str:
+        """Serializes the grid as one flat json object of the arrays and tables instead of
+        one object per voxel. Uses orjson if it is installed.
+
+        Returns:
+            str: The json string.
+        """
+        data = {field: getattr(self, field).tolist() for field in _ARRAY_FIELDS}
+        data["color_table"] = self.color_table
+        data["appearance_table"] = self.appearance_table
+
+        if orjson is not None:
+            return orjson.dumps(data).decode()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, data: str) -> "VoxelGrid":
+        """Creates a grid from a json string written by serialize_json.
+
+        Args:
+            data (str): The json string.
+
+        Returns:
+            VoxelGrid: The loaded grid.
+        """
+        values = orjson.loads(data) if orjson is not None else json.loads(data)
+
+        grid = cls()
+        for field in _ARRAY_FIELDS:
+            getattr(grid, field).extend(values[field])
+        grid._set_tables(values["color_table"], values["appearance_table"])
+        return grid
@@ -1,10 +1,265 @@
+import sys
 from abc import ABC, abstractmethod
-from typing import Tuple, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Tuple, Dict, Any, Optional, Iterable
+from weakref import WeakSet
 
 import adsk.fusion, adsk.core
 
+from .coordinates import pack_center
+
+# id of the "Fusion 360 Appearance Library" which is independent of the language
+MATERIAL_LIBRARY_ID = "BA5EE55E-9982-449B-9D66-9F036540E140"
+
+# part of the name of all appearances which are created by voxler to color voxels
+COLORED_APPEARANCE_INFIX = "__custom_"
+
+# handles which are invariant (or rarely change) and therefore only fetched once from Fusion
+_APP: adsk.core.Application = None
+_DESIGN: adsk.fusion.Design = None
+_MATERIAL_LIBRARY: adsk.core.MaterialLibrary = None
+_X_AXIS: adsk.core.Vector3D = None
+_Y_AXIS: adsk.core.Vector3D = None
+
+# {name: Appearance} of the colored appearances of the active design which have been created
+# or looked up by voxler, so each appearance is only searched by name once per design
+_COLORED_APPEARANCES: Dict[str, adsk.core.Appearance] = {}
+
+# {appearance_id: Appearance} of the appearances looked up in the material library, these
+# do not belong to a design and are therefore kept when the design changes
+_BASE_APPEARANCES: Dict[str, adsk.core.Appearance] = {}
+
+# {color: color} table so all voxels with equal colors share the same tuple instance
+_COLOR_INTERN_TABLE: Dict[Tuple[int, int, int, int], Tuple[int, int, int, int]] = {}
+
+# {(r,g,b,o): Color} so the Fusion color object is only created once per color
+_COLOR_OBJECTS: Dict[Tuple[int, int, int, int], adsk.core.Color] = {}
+
+# whether temporary breps can be created outside of the main thread, None if not probed yet
+_THREADED_TEMP_BREP: Optional[bool] = None
+
+
+def _get_app() -> adsk.core.Application:
+    """Returns the Fusion Application. It is only fetched once.
+
+    Returns:
+        adsk.core.Application: The Fusion Application.
+    """
+    global _APP
+    if _APP is None:
+        _APP = adsk.core.Application.get()
+    return _APP
+
+
+def _get_design() -> adsk.fusion.Design:
+    """Returns the active design. The design is only casted again if the active product
+    changed, e.g. due to switching the document. In this case the appearance caches are
+    cleared as their appearances belong to the previous design.
+
+    Returns:
+        adsk.fusion.Design: The active design.
+    """
+    global _DESIGN, _COLORED_APPEARANCES
+    product = _get_app().activeProduct
+    if _DESIGN is None or _DESIGN != product:
+        _DESIGN = adsk.fusion.Design.cast(product)
+        _COLORED_APPEARANCES = {}
+        Voxel._appearance_cache.clear()
+    return _DESIGN
+
+
+def _check_direct_design():
+    """Ensures that the active design is in DirectDesign mode. This also clears the appearance
+    caches if the active design changed since the last call.
+
+    Raises:
+        RuntimeError: If the active design is a parametric design.
+    """
+    if _get_design().designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        raise RuntimeError(
+            "A instance of a DirectVoxel can not be created in parameteric design environment."
+        )
+
+
+def _x_axis() -> adsk.core.Vector3D:
+    """Returns the (1,0,0) vector which is only created once. Must not be modified."""
+    global _X_AXIS
+    if _X_AXIS is None:
+        _X_AXIS = adsk.core.Vector3D.create(1, 0, 0)
+    return _X_AXIS
+
+
+def _y_axis() -> adsk.core.Vector3D:
+    """Returns the (0,1,0) vector which is only created once. Must not be modified."""
+    global _Y_AXIS
+    if _Y_AXIS is None:
+        _Y_AXIS = adsk.core.Vector3D.create(0, 1, 0)
+    return _Y_AXIS
+
+
+def _copy_translated(
+    template: adsk.fusion.BRepBody, center: Tuple[float]
+) -> adsk.fusion.BRepBody:
+    """Copies the temporary template body and moves the copy by the given center. This is
+    the function which DirectVoxel.create_batch runs in worker threads.
+
+    Args:
+        template (adsk.fusion.BRepBody): The temporary body centered at the origin.
+        center (Tuple[float]): The (x,y,z) translation of the copy.
+
+    Returns:
+        adsk.fusion.BRepBody: The translated temporary copy.
+    """
+    temp_brep_manager = adsk.fusion.TemporaryBRepManager.get()
+    temp_body = temp_brep_manager.copy(template)
+    translation = adsk.core.Matrix3D.create()
+    translation.translation = adsk.core.Vector3D.create(*center)
+    temp_brep_manager.transform(temp_body, translation)
+    return temp_body
+
+
+def _supports_threaded_temp_brep() -> bool:
+    """Probes once whether DirectVoxel.create_batch can run _copy_translated in worker
+    threads. The probe runs the same work as a parallel batch: several workers copy one
+    shared template while the calling thread unites the copies. It only succeeds if no
+    error is raised and the united body has the expected volume.
+
+    Returns:
+        bool: Whether temporary breps can be copied in worker threads.
+    """
+    global _THREADED_TEMP_BREP
+    if _THREADED_TEMP_BREP is None:
+        try:
+            temp_brep_manager = adsk.fusion.TemporaryBRepManager.get()
+            template = DirectCube._create_temp_brep((0, 0, 0), 1)
+            combined = temp_brep_manager.copy(template)
+            # 9 unit cubes in a row which unite to a box with a volume of 9
+            centers = [(x, 0, 0) for x in range(1, 9)]
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                for temp_body in pool.map(partial(_copy_translated, template), centers):
+                    temp_brep_manager.booleanOperation(
+                        combined, temp_body, adsk.fusion.BooleanTypes.UnionBooleanType
+                    )
+            _THREADED_TEMP_BREP = abs(combined.volume - 9) < 1e-6
+        except Exception:
+            _THREADED_TEMP_BREP = False
+    return _THREADED_TEMP_BREP
+
+
+def _get_material_library() -> adsk.core.MaterialLibrary:
+    """Returns the Fusion 360 Appearance Library. The library is only looked up once.
+
+    Returns:
+        adsk.core.MaterialLibrary: The Fusion 360 Appearance Library.
+    """
+    global _MATERIAL_LIBRARY
+    if _MATERIAL_LIBRARY is None or not _MATERIAL_LIBRARY.isValid:
+        _MATERIAL_LIBRARY = _get_app().materialLibraries.itemById(MATERIAL_LIBRARY_ID)
+    return _MATERIAL_LIBRARY
+
+
+def _intern_color(color: Optional[Tuple[int]]) -> Optional[Tuple[int]]:
+    """Returns the shared tuple instance for the given color so equal colors can be
+    compared by identity.
+
+    Args:
+        color (Optional[Tuple[int]]): The (r,g,b,o) color as any sequence or None.
+
+    Returns:
+        Optional[Tuple[int]]: The interned color tuple or None.
+    """
+    if color is None:
+        return None
+    color = tuple(color)
+    return _COLOR_INTERN_TABLE.setdefault(color, color)
+
+
+def _get_color(color: Tuple[int, int, int, int]) -> adsk.core.Color:
+    """Returns the Fusion color object for the given (r,g,b,o) tuple. Color objects are
+    only created once per color and must not be modified.
+
+    Args:
+        color (Tuple[int, int, int, int]): The (r,g,b,o) color (0 to 255).
+
+    Returns:
+        adsk.core.Color: The Fusion color object.
+    """
+    color_object = _COLOR_OBJECTS.get(color)
+    if color_object is None:
+        color_object = adsk.core.Color.create(*color)
+        _COLOR_OBJECTS[color] = color_object
+    return color_object
+
+
+def _intern_appearance(appearance: Optional[str]) -> Optional[str]:
+    """Interns the appearance name so equal appearances can be compared by identity."""
+    return sys.intern(appearance) if appearance is not None else None
+
+
+def _changed(old: Any, new: Any) -> bool:
+    """Checks whether a new attribute value differs from the old one. Identical objects are
+    considered unchanged without comparing their values, which is the common case for
+    interned values or values which are passed through repeatedly.
+    """
+    return new is not old and new != old
+
+
+def _get_base_appearance(appearance_id: str) -> adsk.core.Appearance:
+    """Returns the appearance with the given id from the Fusion 360 Appearance Library.
+    Each id is only looked up once in the library.
+
+    Args:
+        appearance_id (str): The ID of the appearance in the "Fusion 360 Appearance Library".
+
+    Returns:
+        adsk.core.Appearance: The appearance from the library.
+    """
+    base_appearance = _BASE_APPEARANCES.get(appearance_id)
+    if base_appearance is None or not base_appearance.isValid:
+        base_appearance = _get_material_library().appearances.itemById(appearance_id)
+        _BASE_APPEARANCES[appearance_id] = base_appearance
+    return base_appearance
+
+
+def _pack_center(center: Tuple[float], side_length: float) -> Optional[int]:
+    """Packs the center like coordinates.pack_center but returns None instead of raising
+    if the center is not on the grid or exceeds the range of the packed bit fields."""
+    try:
+        return pack_center(center, side_length)
+    except ValueError:
+        return None
+
 
 class Voxel(ABC):
+    __slots__ = (
+        "_component",
+        "_center",
+        "_side_length",
+        "_color",
+        "_appearance",
+        "_body",
+        "__weakref__",
+    )
+
+    # how the voxel is represented in Fusion, "brep" for real bodies and "graphics" for
+    # custom graphics which are only displayed
+    mode: str = None
+
+    # the shape of this voxel. This is similar to the class iteself but easier for comparison
+    # in some cases. Constant per class and read-only on instances.
+    shape: str = None
+
+    # {(appearance_id, (r,g,b,o) or None): Appearance} shared by all voxels as the resolved
+    # appearance only depends on these two values
+    _appearance_cache: Dict[
+        Tuple[str, Optional[Tuple[int, int, int, int]]], adsk.core.Appearance
+    ] = {}
+
+    # voxels which have been created lazily and whose body has not been created yet, only
+    # weakly referenced so voxels which are dropped by the caller are never created
+    _pending: "WeakSet[Voxel]" = WeakSet()
+
     def __init__(
         self,
         component: adsk.fusion.Component,
@@ -12,6 +267,7 @@ class Voxel(ABC):
         side_length: float,
         color: Tuple[str] = None,
         appearance: str = "Prism-256",
+        lazy: bool = False,
     ):
         """Abstract Base class for all voxels. Sets the attributes and calls the _createy_body()
         method of the implementing subclass.
@@ -28,21 +284,56 @@ class Voxel(ABC):
             appearance (str, optional): The appearance of the voxel as ID of the appearance
                 in "Fusion 360 Appearance Library". Defaults to "Prism-256".
                 Can be changed after initialization. Setter method must be implemented by the subclass.
+            lazy (bool, optional): If True the body is not created before it is accessed the
+                first time or Voxel.flush_pending() is called. Defaults to False.
         """
         # these are the attributes which cant be changed after initialization
         self._component = component
         self._center = tuple(center)
         self._side_length = side_length
-        self._color = tuple(color) if color is not None else None
-        self._appearance = appearance
+        # colors and appearances are interned as most voxels share a few distinct values
+        self._color = _intern_color(color)
+        self._appearance = _intern_appearance(appearance)
 
         # create the body
-        self._body = self._create_body()
+        self._body = None
+        if lazy:
+            Voxel._pending.add(self)
+        else:
+            self._body = self._create_body()
 
     def delete(self) -> None:
         """Deletes the voxler instance. Same syntax for every subclass (DirectBodies and CustomGrphics)"""
-        self._body.deleteMe()
-        self._body = None
+        Voxel._pending.discard(self)
+        if self._body is not None:
+            self._body.deleteMe()
+            self._body = None
+
+    @property
+    def is_pending(self) -> bool:
+        """Whether the voxel has been created lazily and its body has not been created yet."""
+        return self in Voxel._pending
+
+    def _materialize(self):
+        """Creates the body of a pending voxel. The voxel stays pending if the creation fails."""
+        self._body = self._create_body()
+        Voxel._pending.discard(self)
+
+    @staticmethod
+    def flush_pending(component: adsk.fusion.Component = None):
+        """Creates the bodies of the lazily created voxels which have not been accessed yet.
+        Pending voxels whose component is no longer valid are dropped.
+
+        Args:
+            component (adsk.fusion.Component, optional): Only the pending voxels of this
+                component are created. Defaults to None which creates the pending voxels of
+                all components.
+        """
+        for voxel in list(Voxel._pending):
+            if not voxel._component.isValid:
+                Voxel._pending.discard(voxel)
+            elif component is None or voxel._component == component:
+                voxel._materialize()
 
     @property
     def component(self) -> adsk.fusion.Component:
@@ -64,6 +355,13 @@ class Voxel(ABC):
     def center(self, new_center: Tuple[float]):
         raise NotImplementedError()
 
+    @property
+    def packed(self) -> Optional[int]:
+        """The center on the grid with the side length of the voxel as packed integer
+        (see coordinates.pack_center). Cheap to hash and compare. None if the center is
+        not on the grid or out of the packable range."""
+        return _pack_center(self._center, self._side_length)
+
     @property
     def side_length(self) -> float:
         """The side length of the voxel."""
@@ -76,7 +374,9 @@ class Voxel(ABC):
 
     @property
     def body(self) -> adsk.fusion.BRepBody:
-        """The Fusion BrePBody this voxel represents."""
+        """The Fusion BrePBody this voxel represents. Creates the body of pending voxels."""
+        if self._body is None and self.is_pending:
+            self._materialize()
         return self._body
 
     @property
@@ -105,11 +405,6 @@ class Voxel(ABC):
         """
         raise NotImplementedError()
 
-    @property
-    def shape(self) -> str:
-        """The shape of this voxel. This is similar to the class iteself but easier for comparison in some cases."""
-        raise NotImplementedError()
-
     def _get_appearance(self) -> adsk.core.Appearance:
         """Utility method to get or create a (colored) appearance from the appearance and
         color attribute of the voxel.
@@ -117,35 +412,73 @@ class Voxel(ABC):
         Returns:
             adsk.core.Appearance: The colored appearance to apply.
         """
-        app = adsk.core.Application.get()
-        design = adsk.fusion.Design.cast(app.activeProduct)
+        return Voxel._lookup_appearance(self._appearance, self._color)
 
-        # gets the Fusion Material Library independent of the language
-        material_library = app.materialLibraries.itemById(
-            "BA5EE55E-9982-449B-9D66-9F036540E140"
-        )
-        base_appearance = material_library.appearances.itemById(self._appearance)
+    @staticmethod
+    def _lookup_appearance(
+        appearance_id: str, color: Optional[Tuple[int, int, int, int]]
+    ) -> adsk.core.Appearance:
+        """Gets or creates the (colored) appearance for the given appearance id and color.
+        The resolved appearances are cached for each (appearance, color) combination.
+
+        Args:
+            appearance_id (str): The ID of the appearance in the "Fusion 360 Appearance Library".
+            color (Optional[Tuple[int, int, int, int]]): The (r,g,b,o) color or None.
+
+        Returns:
+            adsk.core.Appearance: The colored appearance to apply.
+        """
+        key = (appearance_id, color)
+        appearance = Voxel._appearance_cache.get(key)
+        # the appearance gets invalid if it has been deleted or its document got closed
+        if appearance is None or not appearance.isValid:
+            appearance = Voxel._resolve_appearance(appearance_id, color)
+            Voxel._appearance_cache[key] = appearance
+        return appearance
+
+    @staticmethod
+    def _resolve_appearance(
+        appearance_id: str, color: Optional[Tuple[int, int, int, int]]
+    ) -> adsk.core.Appearance:
+        """Looks up or creates the (colored) appearance in Fusion without using the cache.
+
+        Args:
+            appearance_id (str): The ID of the appearance in the "Fusion 360 Appearance Library".
+            color (Optional[Tuple[int, int, int, int]]): The (r,g,b,o) color or None.
+
+        Returns:
+            adsk.core.Appearance: The colored appearance to apply.
+        """
+        design = _get_design()
+
+        base_appearance = _get_base_appearance(appearance_id)
         # base_appearance = material_library.appearances.itemByName(base_appearance.name)
 
-        if self._color is None:
+        if color is None:
             # no not use id since it is kept at creation of new custom apperance
             # appearace_des = design.appearances.itemByName(base_appearance.name)
             return base_appearance  # appearace_des
 
         # create the name of the colored appearance
-        r, g, b, o = self._color
-        colored_appearance_name = f"{self._appearance}__custom_r{r}g{g}b{b}o{o}"
+        r, g, b, o = color
+        colored_appearance_name = (
+            f"{appearance_id}{COLORED_APPEARANCE_INFIX}r{r}g{g}b{b}o{o}"
+        )
 
         # create or get the colored appearance
-        colored_appearance = design.appearances.itemByName(colored_appearance_name)
-        if colored_appearance is None:
-            colored_appearance = design.appearances.addByCopy(
-                base_appearance,
-                colored_appearance_name,
-            )
-            colored_appearance.appearanceProperties.itemById(
-                "surface_albedo"
-            ).value = adsk.core.Color.create(r, g, b, o)
+        colored_appearance = _COLORED_APPEARANCES.get(colored_appearance_name)
+        if colored_appearance is None or not colored_appearance.isValid:
+            # the appearance might already exist in the design, e.g. from an earlier session
+            colored_appearance = design.appearances.itemByName(colored_appearance_name)
+            if colored_appearance is None:
+                colored_appearance = design.appearances.addByCopy(
+                    base_appearance,
+                    colored_appearance_name,
+                )
+                colored_appearance.appearanceProperties.itemById(
+                    "surface_albedo"
+                ).value = _get_color(color)
+            _COLORED_APPEARANCES[colored_appearance_name] = colored_appearance
 
         return colored_appearance
 
@@ -178,6 +511,10 @@ class Voxel(ABC):
         }
 
     def recreate_body(self):
+        # pending voxels will be created with the current attributes anyway and deleted
+        # voxels must not get a new body
+        if self._body is None:
+            return
         self.delete()
         self._body = self._create_body()
 
@@ -187,6 +524,10 @@ class Voxel(ABC):
 
 
 class DirectVoxel(Voxel):
+    __slots__ = ("_name",)
+
+    mode = "brep"
+
     def __init__(
         self,
         component: adsk.fusion.Component,
@@ -195,6 +536,7 @@ class DirectVoxel(Voxel):
         color: Tuple[str] = None,
         appearance: str = "Prism-256",
         name: str = "Voxel",
+        lazy: bool = False,
     ):
         """Abstract Base class for all voxels created as a direct brepbody with the TemporaryBrepManager.
         Ensures that the design is currently in DirectDesign mode.
@@ -212,17 +554,14 @@ class DirectVoxel(Voxel):
                 in "Fusion 360 Appearance Library". Defaults to "Prism-256".
                 Can be changed after initialization. Setter method must be implemented by the subclass.
             name (str, optional): The name of the representing body in Fusion. Defaults to "voxel".
+            lazy (bool, optional): If True the body is not created before it is accessed the
+                first time or Voxel.flush_pending() is called. Defaults to False.
         """
-        app = adsk.core.Application.get()
-        design = adsk.fusion.Design.cast(app.activeProduct)
-        if design.designType == adsk.fusion.DesignTypes.ParametricDesignType:
-            raise RuntimeError(
-                "A instance of a DirectVoxel can not be created in parameteric design environment."
-            )
+        _check_direct_design()
 
         self._name = name
 
-        super().__init__(component, center, side_length, color, appearance)
+        super().__init__(component, center, side_length, color, appearance, lazy)
 
     @property
     def name(self):
@@ -230,42 +569,187 @@ class DirectVoxel(Voxel):
 
     @name.setter
     def name(self, new_name):
-        if self._name != new_name:
+        if _changed(self._name, new_name):
             self._name = new_name
-            self._body.name = new_name
+            if self._body is not None:
+                self._body.name = new_name
 
     @Voxel.color.setter
     def color(self, new_color):
-        new_color = tuple(new_color) if new_color is not None else None
-        if self._color != new_color:
+        if new_color is self._color:
+            return
+        # interned colors are equal if and only if they are identical
+        new_color = _intern_color(new_color)
+        if new_color is not self._color:
             self._color = new_color
-            self._body.appearance = self._get_appearance()
+            if self._body is not None:
+                self._body.appearance = self._get_appearance()
 
     @Voxel.appearance.setter
     def appearance(self, new_appearance_name):
-        if new_appearance_name != self._appearance:
+        if new_appearance_name is self._appearance:
+            return
+        new_appearance_name = _intern_appearance(new_appearance_name)
+        if new_appearance_name is not self._appearance:
             self._appearance = new_appearance_name
-            self._body.appearance = self._get_appearance()
+            if self._body is not None:
+                self._body.appearance = self._get_appearance()
 
     @Voxel.component.setter
     def component(self, new_component: adsk.fusion.Component):
-        if new_component.id != self._component.id:
+        if new_component is not self._component and _changed(
+            self._component.id, new_component.id
+        ):
             self._component = new_component
             self.recreate_body()
 
     @Voxel.center.setter
     def center(self, new_center: Tuple[float]):
         new_center = tuple(new_center)
-        if self._center != new_center:
+        if _changed(self._center, new_center):
+            offset = [n - o for n, o in zip(new_center, self._center)]
             self._center = new_center
-            self.recreate_body()
+            if self._body is not None:
+                self._translate_body(offset)
+
+    def _translate_body(self, offset: Tuple[float]):
+        """Moves the existing body by the given offset with a move feature instead of
+        recreating it. The TemporaryBRepManager can only transform temporary bodies, so
+        a move feature is used for the already added body. As the design is in direct
+        mode no timeline entry is created.
+
+        Args:
+            offset (Tuple[float]): The (dx,dy,dz) translation in Fusion units.
+        """
+        entities = adsk.core.ObjectCollection.create()
+        entities.add(self._body)
+
+        transform = adsk.core.Matrix3D.create()
+        transform.translation = adsk.core.Vector3D.create(*offset)
+
+        move_features = self._component.features.moveFeatures
+        move_input = move_features.createInput2(entities)
+        move_input.defineAsFreeMove(transform)
+        move_features.add(move_input)
 
     @Voxel.side_length.setter
     def side_length(self, new_side_length: float):
-        if new_side_length != self._side_length:
+        if _changed(self._side_length, new_side_length):
             self._side_length = new_side_length
+            # a scale feature would need a sketch or construction point as base point,
+            # so the body is simply recreated
             self.recreate_body()
 
+    @staticmethod
+    @abstractmethod
+    def _create_temp_brep(
+        center: Tuple[float], side_length: float
+    ) -> adsk.fusion.BRepBody:
+        """Creates the temporary BRepBody which defines the shape of the voxel. Must be
+        implemented by each subclass.
+
+        Args:
+            center (Tuple[float]): The center point of the voxel as (x,y,z) tuple.
+            side_length (float): The side length of the voxel.
+
+        Returns:
+            adsk.fusion.BRepBody: The temporary (not yet added) BRepBody.
+        """
+        raise NotImplementedError()
+
+    def _create_body(self) -> adsk.fusion.BRepBody:
+        """Adds the temporary BRepBody of the subclass to the component and applies the
+        appearance and name of the voxel.
+
+        Returns:
+            adsk.fusion.BRepBody: The created BrepBody
+        """
+        new_body = self._component.bRepBodies.add(
+            self._create_temp_brep(self._center, self._side_length)
+        )
+        new_body.appearance = self._get_appearance()
+        new_body.name = self._name
+        return new_body
+
+    @classmethod
+    def create_batch(
+        cls,
+        component: adsk.fusion.Component,
+        centers: Iterable[Tuple[float]],
+        side_length: float,
+        color: Tuple[int] = None,
+        appearance: str = "Prism-256",
+        name: str = "Voxels",
+        parallel: bool = False,
+    ) -> adsk.fusion.BRepBody:
+        """Creates many voxels of the same shape, size and appearance at once as a single body.
+        All voxels are united in memory by the TemporaryBRepManager so only one body gets added
+        to the component and only one appearance gets assigned. The returned body is not
+        managed by any voxel instance and must be deleted by the caller.
+        Optionally the template is copied and translated in a thread pool while the copies
+        are united on the calling thread.
+
+        Args:
+            component (adsk.fusion.Component): The component into which the body is created.
+            centers (Iterable[Tuple[float]]): The center points of the voxels as (x,y,z) tuples.
+            side_length (float): The side length of the voxels in Fusion units.
+            color (Tuple[int], optional): Color of the voxels as (r,g,b,o) tuple (0 to 255).
+                Defaults to the standard appearance.
+            appearance (str, optional): The appearance of the voxels as ID of the appearance
+                in "Fusion 360 Appearance Library". Defaults to "Prism-256".
+            name (str, optional): The name of the created body. Defaults to "Voxels".
+            parallel (bool, optional): Whether to copy and translate the template in worker
+                threads. The Fusion API is in general only safe to use from the main thread,
+                therefore this is opt-in and falls back to serial creation if a probe of this
+                concurrent copying fails. Defaults to False.
+
+        Returns:
+            adsk.fusion.BRepBody: The single body containing all voxels or None if no
+                centers have been passed.
+
+        Raises:
+            RuntimeError: If the active design is a parametric design.
+        """
+        # also makes sure the cached appearances belong to the active design
+        _check_direct_design()
+
+        temp_brep_manager = adsk.fusion.TemporaryBRepManager.get()
+
+        # all voxels share the same shape, so a template at the origin is only created once
+        # and copied to each center which is cheaper than modeling every voxel from scratch
+        template = cls._create_temp_brep((0, 0, 0), side_length)
+        create_temp_brep = partial(_copy_translated, template)
+
+        pool = None
+        if parallel and _supports_threaded_temp_brep():
+            pool = ThreadPoolExecutor()
+            temp_bodies = pool.map(create_temp_brep, centers)
+        else:
+            temp_bodies = map(create_temp_brep, centers)
+
+        combined = None
+        try:
+            for temp_body in temp_bodies:
+                if combined is None:
+                    combined = temp_body
+                else:
+                    temp_brep_manager.booleanOperation(
+                        combined, temp_body, adsk.fusion.BooleanTypes.UnionBooleanType
+                    )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if combined is None:
+            return None
+
+        body = component.bRepBodies.add(combined)
+        body.appearance = Voxel._lookup_appearance(
+            appearance, tuple(color) if color is not None else None
+        )
+        body.name = name
+        return body
+
     def serialize(self) -> Dict[str, Any]:
         """Returns a serializable dict which represents the properties of the voxel.
         All attributes are json serializable. Contains the attributes {component_name, name, center, side_length,
@@ -278,6 +762,10 @@ class DirectVoxel(Voxel):
 
 
 class DirectCube(DirectVoxel):
+    __slots__ = ()
+
+    shape = "cube"
+
     def __init__(
         self,
         component: adsk.fusion.Component,
@@ -286,6 +774,7 @@ class DirectCube(DirectVoxel):
         color: Tuple[str] = None,
         appearance: str = "Prism-256",
         name: str = "Cube",
+        lazy: bool = False,
     ):
         """Instantiabale class for which represents a cubic voxel created as a direct brepbody with the TemporaryBrepManager.
 
@@ -302,39 +791,42 @@ class DirectCube(DirectVoxel):
                 in "Fusion 360 Appearance Library". Defaults to "Prism-256".
                 Can be changed after initialization. Setter method must be implemented by the subclass.
             name (str, optional): The name of the representing body in Fusion. Defaults to "cube".
+            lazy (bool, optional): If True the body is not created before it is accessed the
+                first time or Voxel.flush_pending() is called. Defaults to False.
         """
-        super().__init__(component, center, side_length, color, appearance, name)
+        super().__init__(component, center, side_length, color, appearance, name, lazy)
 
-    def _create_body(self) -> adsk.fusion.BRepBody:
-        """Creates a cube accorsing to the properties of the voxel as a BrepBody using the
+    @staticmethod
+    def _create_temp_brep(
+        center: Tuple[float], side_length: float
+    ) -> adsk.fusion.BRepBody:
+        """Creates a cube with the given center and side length as temporary BrepBody using the
         TemporaryBrepManager.
 
+        Args:
+            center (Tuple[float]): The center point of the cube as (x,y,z) tuple.
+            side_length (float): The side length of the cube.
+
         Returns:
-            adsk.fusion.BRepBody: The created BrepBody
+            adsk.fusion.BRepBody: The created temporary BrepBody
         """
-        new_body = self._component.bRepBodies.add(
-            adsk.fusion.TemporaryBRepManager.get().createBox(
-                adsk.core.OrientedBoundingBox3D.create(
-                    adsk.core.Point3D.create(*self._center),
-                    adsk.core.Vector3D.create(1, 0, 0),
-                    adsk.core.Vector3D.create(0, 1, 0),
-                    self._side_length,
-                    self._side_length,
-                    self._side_length,
-                )
+        return adsk.fusion.TemporaryBRepManager.get().createBox(
+            adsk.core.OrientedBoundingBox3D.create(
+                adsk.core.Point3D.create(*center),
+                _x_axis(),
+                _y_axis(),
+                side_length,
+                side_length,
+                side_length,
             )
         )
-        new_body.appearance = self._get_appearance()
-        new_body.name = self._name
-        return new_body
-
-    @property
-    def shape(self) -> str:
-        """Returns "cube"."""
-        return "cube"
 
 
 class DirectSphere(DirectVoxel):
+    __slots__ = ()
+
+    shape = "sphere"
+
     def __init__(
         self,
         component: adsk.fusion.Component,
@@ -343,6 +835,7 @@ class DirectSphere(DirectVoxel):
         color: Tuple[str] = None,
         appearance: str = "Prism-256",
         name: str = "Sphere",
+        lazy: bool = False,
     ):
         """Instantiabale class for which represents a spheric voxel created as a direct brepbody with the TemporaryBrepManager.
 
@@ -359,112 +852,363 @@ class DirectSphere(DirectVoxel):
                 in "Fusion 360 Appearance Library". Defaults to "Prism-256".
                 Can be changed after initialization. Setter method must be implemented by the subclass.
             name (str, optional): The name of the representing body in Fusion. Defaults to "Sphere".
+            lazy (bool, optional): If True the body is not created before it is accessed the
+                first time or Voxel.flush_pending() is called. Defaults to False.
         """
-        super().__init__(component, center, side_length, color, appearance, name)
+        super().__init__(component, center, side_length, color, appearance, name, lazy)
 
-    def _create_body(self) -> adsk.fusion.BRepBody:
-        """Creates a sphere accorsing to the properties of the voxel as a BrepBody using the
-        TemporaryBrepManager.
+    @staticmethod
+    def _create_temp_brep(
+        center: Tuple[float], side_length: float
+    ) -> adsk.fusion.BRepBody:
+        """Creates a sphere with the given center and side length as diameter as temporary
+        BrepBody using the TemporaryBrepManager.
+
+        Args:
+            center (Tuple[float]): The center point of the sphere as (x,y,z) tuple.
+            side_length (float): The diameter of the sphere.
 
         Returns:
-            adsk.fusion.BRepBody: The created BrepBody
+            adsk.fusion.BRepBody: The created temporary BrepBody
         """
-        new_body = self._component.bRepBodies.add(
-            adsk.fusion.TemporaryBRepManager.get().createSphere(
-                adsk.core.Point3D.create(*self._center), self._side_length / 2
-            )
+        return adsk.fusion.TemporaryBRepManager.get().createSphere(
+            adsk.core.Point3D.create(*center), side_length / 2
         )
-        new_body.appearance = self._get_appearance()
-        new_body.name = self._name
-        return new_body
+
+
+# unit cube centered at the origin as mesh with 4 vertices and one normal per face
+# so the faces are shaded flat
+_CUBE_FACES = [
+    # (normal, 4 corners in counter clockwise order seen from outside)
+    ((1, 0, 0), [(1, -1, -1), (1, 1, -1), (1, 1, 1), (1, -1, 1)]),
+    ((-1, 0, 0), [(-1, 1, -1), (-1, -1, -1), (-1, -1, 1), (-1, 1, 1)]),
+    ((0, 1, 0), [(1, 1, -1), (-1, 1, -1), (-1, 1, 1), (1, 1, 1)]),
+    ((0, -1, 0), [(-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1)]),
+    ((0, 0, 1), [(-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)]),
+    ((0, 0, -1), [(-1, 1, -1), (1, 1, -1), (1, -1, -1), (-1, -1, -1)]),
+]
+CUBE_MESH_COORDINATES = [
+    c / 2 for _, corners in _CUBE_FACES for corner in corners for c in corner
+]
+CUBE_MESH_NORMALS = [n for normal, _ in _CUBE_FACES for _ in range(4) for n in normal]
+CUBE_MESH_INDICES = [
+    4 * f + i for f in range(len(_CUBE_FACES)) for i in (0, 1, 2, 0, 2, 3)
+]
+
+
+def _get_graphics_group(
+    component: adsk.fusion.Component, cg_group_id: str
+) -> adsk.fusion.CustomGraphicsGroup:
+    """Finds or creates the custom graphics group with the given id in the component.
+
+    Args:
+        component (adsk.fusion.Component): The component which owns the group.
+        cg_group_id (str): The id of the group.
+
+    Returns:
+        adsk.fusion.CustomGraphicsGroup: The custom graphics group.
+    """
+    for cg_group in component.customGraphicsGroups:
+        if cg_group.id == cg_group_id:
+            return cg_group
+    cg_group = component.customGraphicsGroups.add()
+    cg_group.id = cg_group_id
+    return cg_group
+
+
+class CGVoxel(Voxel):
+    __slots__ = ("_name", "_cg_group_id", "_graphics")
+
+    # {(appearance_id, (r,g,b,o) or None): CustomGraphicsColorEffect} shared by all voxels
+    _color_effect_cache: Dict[
+        Tuple[Optional[str], Optional[Tuple[int, int, int, int]]],
+        adsk.fusion.CustomGraphicsColorEffect,
+    ] = {}
+
+    mode = "graphics"
+
+    def __init__(
+        self,
+        component: adsk.fusion.Component,
+        center: Tuple[int],
+        side_length: float,
+        color: Tuple[str] = None,
+        appearance: str = "Prism-256",
+        name: str = "Voxel",
+        cg_group_id: str = "voxler",
+        lazy: bool = False,
+    ):
+        """Abstract Base class for all voxels which are only displayed as custom graphics
+        entity. Custom graphics are not part of the model and much faster to create than
+        BRepBodies, so these voxels are meant for previews and visualizations.
+        The entity is created once with unit size at the origin and is placed by its
+        transform, so changing the center or the side length does not recreate it.
+
+        Args:
+            component (adsk.fusion.Component): The component into which the voxel is created.
+            center (Tuple[int]): The center point of the voxel as (x,y,z) tuple. The scale
+                is according to the Fusion units.
+            side_length (float): The side length in Fusion units.
+            color (Tuple[str], optional): Color of the voxel as (r,g,b,o) tuple (0 to 255).
+                If given the voxel is displayed in this plain color. Defaults to None.
+            appearance (str, optional): The appearance of the voxel as ID of the appearance
+                in "Fusion 360 Appearance Library" which is used if no color is given.
+                If neither color nor appearance is given the voxel is black.
+                Defaults to "Prism-256".
+            name (str, optional): The id of the custom graphics entity. Defaults to "Voxel".
+            cg_group_id (str, optional): The id of the custom graphics group in the component
+                into which the entity is created. Defaults to "voxler".
+            lazy (bool, optional): If True the entity is not created before it is accessed the
+                first time or Voxel.flush_pending() is called. Defaults to False.
+        """
+        # must be set before calling the parent constructor which calls _create_body
+        self._name = name
+        self._cg_group_id = cg_group_id
+        self._graphics = _get_graphics_group(component, cg_group_id)
+
+        super().__init__(component, center, side_length, color, appearance, lazy)
 
     @property
-    def shape(self) -> str:
-        """Returns "sphere"."""
-        return "sphere"
-
-
-# region
-# class CGVoxel(Voxel):
-#     def __init__(
-#         self,
-#         component,
-#         center,
-#         side_length,
-#         color=(255, 0, 0, 255),
-#         appearance=None,
-#         cg_group_id="voxler",
-#     ):
-#         # find or create the custom grapohics group
-#         # this needs to be set before callnig the parent constructor because
-#         # the apretn contructor will call _create_body which depends on self._graphics
-#         self._graphics = None
-#         for cg_group in component.customGraphicsGroups:
-#             if cg_group.id == cg_group_id:
-#                 self._graphics = cg_group
-#         if self._graphics is None:
-#             self._graphics = component.customGraphicsGroups.add()
-#             self._graphics.id = cg_group_id
-
-#         super().__init__(component, center, side_length, color, appearance)
-
-#     def _get_cg_appearannce(self):
-#         if self.appearance is None:
-#             if self.color is None:
-#                 return adsk.fusion.CustomGraphicsBasicMaterialColorEffect.create(
-#                     adsk.core.Color.create(0, 0, 0, 255)
-#                 )
-#             else:
-#                 return adsk.fusion.CustomGraphicsBasicMaterialColorEffect.create(
-#                     adsk.core.Color.create(*self.color)
-#                 )
-#         else:
-#             return adsk.fusion.CustomGraphicsAppearanceColorEffect.create(
-#                 self._get_appearance()
-#             )
-
-#     def serialize(self) -> Dict[str, Any]:
-#         # TODO
-#         return super().serialize()
-
-#     @Voxel.color.setter
-#     def color(self, new_color):
-#         self._color = new_color
-#         self._body.color = self._get_cg_appearannce()
-
-#     @Voxel.appearance.setter
-#     def appearance(self, appearance_name):
-#         self._appearance = appearance_name
-#         self._body.color = self._get_cg_appearannce()
-
-
-# class CGCube(CGVoxel):
-#     # def __init__(self, component, center, side_length, color, appearance, cg_group_id):
-#     #     super().__init__(component, center, side_length, color, appearance, cg_group_id)
-
-#     def _create_body(self):
-#         return self._graphics.addBRepBody(
-#             adsk.fusion.TemporaryBRepManager.get().createBox(
-#                 adsk.core.OrientedBoundingBox3D.create(
-#                     adsk.core.Point3D.create(*self._center),
-#                     adsk.core.Vector3D.create(1, 0, 0),
-#                     adsk.core.Vector3D.create(0, 1, 0),
-#                     self._side_length,
-#                     self._side_length,
-#                     self._side_length,
-#                 )
-#             )
-#         )
-
-
-# class CGSphere(CGVoxel):
-#     # def __init__(self, component, center, side_length, color, appearance, cg_group_id):
-#     #     super().__init__(component, center, side_length, color, appearance, cg_group_id)
-
-#     def _create_body(self):
-#         return self._graphics.addBRepBody(
-#             adsk.fusion.TemporaryBRepManager.get().createSphere(
-#                 adsk.core.Point3D.create(*self._center), self._side_length / 2
-#             )
-#         )
-# endregion
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, new_name):
+        if _changed(self._name, new_name):
+            self._name = new_name
+            if self._body is not None:
+                self._body.id = new_name
+
+    def _get_color_effect(self) -> adsk.fusion.CustomGraphicsColorEffect:
+        """Gets the color effect for the color or appearance of the voxel. The effects are
+        shared by all voxels with the same color and appearance.
+
+        Returns:
+            adsk.fusion.CustomGraphicsColorEffect: The color effect to apply.
+        """
+        return CGVoxel._lookup_color_effect(self._appearance, self._color)
+
+    @staticmethod
+    def _lookup_color_effect(
+        appearance_id: Optional[str], color: Optional[Tuple[int, int, int, int]]
+    ) -> adsk.fusion.CustomGraphicsColorEffect:
+        """Gets or creates the custom graphics color effect for the given appearance and color.
+        A plain color is used if a color is given, otherwise the appearance. If neither is
+        given the effect is black.
+
+        Args:
+            appearance_id (Optional[str]): The ID of the appearance in the "Fusion 360 Appearance Library".
+            color (Optional[Tuple[int, int, int, int]]): The (r,g,b,o) color or None.
+
+        Returns:
+            adsk.fusion.CustomGraphicsColorEffect: The color effect to apply.
+        """
+        key = (appearance_id, color)
+        effect = CGVoxel._color_effect_cache.get(key)
+        if effect is None:
+            if color is None and appearance_id is not None:
+                effect = adsk.fusion.CustomGraphicsAppearanceColorEffect.create(
+                    Voxel._lookup_appearance(appearance_id, None)
+                )
+            else:
+                effect = adsk.fusion.CustomGraphicsBasicMaterialColorEffect.create(
+                    _get_color(color or (0, 0, 0, 255))
+                )
+            CGVoxel._color_effect_cache[key] = effect
+        return effect
+
+    def _get_transform(self) -> adsk.core.Matrix3D:
+        """The transform which scales the unit sized entity to the side length and moves it
+        to the center of the voxel.
+
+        Returns:
+            adsk.core.Matrix3D: The transform of the custom graphics entity.
+        """
+        x, y, z = self._center
+        s = self._side_length
+        transform = adsk.core.Matrix3D.create()
+        transform.setWithArray([s, 0, 0, x, 0, s, 0, y, 0, 0, s, z, 0, 0, 0, 1])
+        return transform
+
+    @abstractmethod
+    def _create_unit_entity(self) -> adsk.fusion.CustomGraphicsEntity:
+        """Creates the entity with unit size at the origin in the custom graphics group.
+        Must be implemented by each subclass.
+
+        Returns:
+            adsk.fusion.CustomGraphicsEntity: The created entity.
+        """
+        raise NotImplementedError()
+
+    def _create_body(self) -> adsk.fusion.CustomGraphicsEntity:
+        """Creates the custom graphics entity and applies the transform, color and name.
+
+        Returns:
+            adsk.fusion.CustomGraphicsEntity: The created entity.
+        """
+        entity = self._create_unit_entity()
+        entity.transform = self._get_transform()
+        entity.color = self._get_color_effect()
+        entity.id = self._name
+        return entity
+
+    @Voxel.color.setter
+    def color(self, new_color):
+        if new_color is self._color:
+            return
+        # interned colors are equal if and only if they are identical
+        new_color = _intern_color(new_color)
+        if new_color is not self._color:
+            self._color = new_color
+            if self._body is not None:
+                self._body.color = self._get_color_effect()
+
+    @Voxel.appearance.setter
+    def appearance(self, new_appearance_name):
+        if new_appearance_name is self._appearance:
+            return
+        new_appearance_name = _intern_appearance(new_appearance_name)
+        if new_appearance_name is not self._appearance:
+            self._appearance = new_appearance_name
+            if self._body is not None:
+                self._body.color = self._get_color_effect()
+
+    @Voxel.component.setter
+    def component(self, new_component: adsk.fusion.Component):
+        if new_component is not self._component and _changed(
+            self._component.id, new_component.id
+        ):
+            self._component = new_component
+            self._graphics = _get_graphics_group(new_component, self._cg_group_id)
+            self.recreate_body()
+
+    @Voxel.center.setter
+    def center(self, new_center: Tuple[float]):
+        new_center = tuple(new_center)
+        if _changed(self._center, new_center):
+            self._center = new_center
+            if self._body is not None:
+                self._body.transform = self._get_transform()
+
+    @Voxel.side_length.setter
+    def side_length(self, new_side_length: float):
+        if _changed(self._side_length, new_side_length):
+            self._side_length = new_side_length
+            if self._body is not None:
+                self._body.transform = self._get_transform()
+
+    def serialize(self) -> Dict[str, Any]:
+        """Returns a serializable dict which represents the properties of the voxel.
+        All attributes are json serializable. Contains the attributes {component_name, name, center, side_length,
+        color, appearance, shape}
+
+        Returns:
+            Dict[str, Any]: The serialized version of this voxel instance.
+        """
+        return {**super().serialize(), "name": self.name}
+
+
+class CGCube(CGVoxel):
+    __slots__ = ()
+
+    shape = "cube"
+
+    def __init__(
+        self,
+        component: adsk.fusion.Component,
+        center: Tuple[int],
+        side_length: float,
+        color: Tuple[str] = None,
+        appearance: str = "Prism-256",
+        name: str = "Cube",
+        cg_group_id: str = "voxler",
+        lazy: bool = False,
+    ):
+        """Instantiabale class which represents a cubic voxel displayed as custom graphics mesh.
+
+        Args:
+            component (adsk.fusion.Component): The component into which the voxel is created.
+            center (Tuple[int]): The center point of the voxel as (x,y,z) tuple. The scale
+                is according to the Fusion units.
+            side_length (float): The side length in Fusion units.
+            color (Tuple[str], optional): Color of the voxel as (r,g,b,o) tuple (0 to 255).
+                If given the voxel is displayed in this plain color. Defaults to None.
+            appearance (str, optional): The appearance of the voxel as ID of the appearance
+                in "Fusion 360 Appearance Library" which is used if no color is given.
+                Defaults to "Prism-256".
+            name (str, optional): The id of the custom graphics entity. Defaults to "Cube".
+            cg_group_id (str, optional): The id of the custom graphics group in the component
+                into which the entity is created. Defaults to "voxler".
+            lazy (bool, optional): If True the entity is not created before it is accessed the
+                first time or Voxel.flush_pending() is called. Defaults to False.
+        """
+        super().__init__(
+            component, center, side_length, color, appearance, name, cg_group_id, lazy
+        )
+
+    def _create_unit_entity(self) -> adsk.fusion.CustomGraphicsMesh:
+        """Creates a unit cube mesh at the origin.
+
+        Returns:
+            adsk.fusion.CustomGraphicsMesh: The created mesh.
+        """
+        return self._graphics.addMesh(
+            adsk.fusion.CustomGraphicsCoordinates.create(CUBE_MESH_COORDINATES),
+            CUBE_MESH_INDICES,
+            CUBE_MESH_NORMALS,
+            CUBE_MESH_INDICES,
+        )
+
+
+class CGSphere(CGVoxel):
+    __slots__ = ()
+
+    shape = "sphere"
+
+    def __init__(
+        self,
+        component: adsk.fusion.Component,
+        center: Tuple[int],
+        side_length: float,
+        color: Tuple[str] = None,
+        appearance: str = "Prism-256",
+        name: str = "Sphere",
+        cg_group_id: str = "voxler",
+        lazy: bool = False,
+    ):
+        """Instantiabale class which represents a spheric voxel displayed as custom graphics.
+
+        Args:
+            component (adsk.fusion.Component): The component into which the voxel is created.
+            center (Tuple[int]): The center point of the voxel as (x,y,z) tuple. The scale
+                is according to the Fusion units.
+            side_length (float): The diameter in Fusion units.
+            color (Tuple[str], optional): Color of the voxel as (r,g,b,o) tuple (0 to 255).
+                If given the voxel is displayed in this plain color. Defaults to None.
+            appearance (str, optional): The appearance of the voxel as ID of the appearance
+                in "Fusion 360 Appearance Library" which is used if no color is given.
+                Defaults to "Prism-256".
+            name (str, optional): The id of the custom graphics entity. Defaults to "Sphere".
+            cg_group_id (str, optional): The id of the custom graphics group in the component
+                into which the entity is created. Defaults to "voxler".
+            lazy (bool, optional): If True the entity is not created before it is accessed the
+                first time or Voxel.flush_pending() is called. Defaults to False.
+        """
+        super().__init__(
+            component, center, side_length, color, appearance, name, cg_group_id, lazy
+        )
+
+    def _create_unit_entity(self) -> adsk.fusion.CustomGraphicsBRepBody:
+        """Creates a sphere with unit diameter at the origin from a temporary BRepBody.
+
+        Returns:
+            adsk.fusion.CustomGraphicsBRepBody: The created entity.
+        """
+        return self._graphics.addBRepBody(DirectSphere._create_temp_brep((0, 0, 0), 1))
+
+
+# {(shape, mode): voxel_class} of all instantiable voxel classes
+VOXEL_CLASSES = {
+    (voxel_class.shape, voxel_class.mode): voxel_class
+    for voxel_class in (DirectCube, DirectSphere, CGCube, CGSphere)
+}
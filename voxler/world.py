@@ -3,7 +3,7 @@ from typing import List, Dict, Tuple, Any
 
 import adsk.core, adsk.fusion
 
-from .voxels import DirectCube, DirectSphere, Voxel
+from .voxels import VOXEL_CLASSES, Voxel
 
 
 class VoxelWorld:
@@ -12,6 +12,7 @@ class VoxelWorld:
         grid_size: float,
         component: adsk.fusion.Component,
         offset: Tuple[int] = (0, 0, 0),
+        mode: str = "brep",
     ):
         """A world contains a set of voxels. For the voxels the following conditions are
         ensured:
@@ -19,8 +20,9 @@ class VoxelWorld:
             - a world existst in exctly one component
             - only one body per voxel at same time
             - working design and creation modes are determined by the used voxel classes
-            - only DirectVoxels which accept the parameters {color, appearance, name} besides
+            - only voxels which accept the parameters {color, appearance, name} besides
                 center and side_length are possible
+            - all voxels have the same mode, i.e. are either real bodies or custom graphics
 
         In general the position of voxels are given in game coordinates which represents the
         distance from the offset to the center of the voxel in multitudes of the grid size.
@@ -31,11 +33,17 @@ class VoxelWorld:
             component (adsk.fusion.Component): The component into which the bodies/voxels are created.
             offset (Tuple[int], optional): The offset which is added to the center of each created voxel.
                 The offset is measure in voxel units aka the grid size. Defaults to (0, 0, 0).
+            mode (str, optional): How the voxels are represented. "brep" creates DirectVoxels
+                as real bodies and "graphics" creates CGVoxels which are only displayed as
+                custom graphics but much faster to create. Defaults to "brep".
         """
+        if mode not in ("brep", "graphics"):
+            raise ValueError("Invalid mode argument.")
 
         self._grid_size = grid_size
         self._component = component
         self._offset = offset
+        self._mode = mode
 
         # {(x_game,y_game,z_game):Voxel} main dict representing/tracking all the voxels in the world
         self._voxels: Dict[Tuple[int], Voxel] = {}
@@ -71,19 +79,16 @@ class VoxelWorld:
         Args:
             coordinates (Tuple[int]): The (x_game, y_game, z_game) coordinates of the voxel.
             shape (str, optional): The shape of the added voxel. Possible values are "cube"
-                which results in a DirectCube voxel beeing instantiaed and "sphere" which
-                results in a DirectSphere beeing instantiated. Defaults to "cube".
+                which results in a DirectCube (or CGCube) voxel beeing instantiaed and "sphere" which
+                results in a DirectSphere (or CGSphere) beeing instantiated. Defaults to "cube".
             color (Tuple[int], optional): The (r,g,b,o) tuple which gets passed to the
                 Voxel constructor. Defaults to None.
             appearance (str, optional): The name of the used appearance which gets passed to
                 the voxel constructor. Defaults to "Prism-256".
             name (str, optional): The body name of the created voxel. Defaults to "voxel".
         """
-        if shape == "cube":
-            voxel_class = DirectCube
-        elif shape == "sphere":
-            voxel_class = DirectSphere
-        else:
+        voxel_class = VOXEL_CLASSES.get((shape, self._mode))
+        if voxel_class is None:
             raise ValueError("Invalid shape argument.")
 
         # delete the voxel from the world if it already exists and has a differnt type than
@@ -309,6 +314,10 @@ class VoxelWorld:
     def offset(self):
         return self._offset
 
+    @property
+    def mode(self):
+        return self._mode
+
     def set_grid_size(
         self, new_grid_size: int, progress_dialog: adsk.core.ProgressDialog = None
     ) -> bool: